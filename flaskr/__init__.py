@@ -15,10 +15,13 @@ Explanation:
    - `__name__` tells Flask where to find resources.
    - `instance_relative_config=True` allows the app to use a separate instance folder for configurations.
 
-4. `app.config.from_mapping(...)`:
-   - Sets up default configurations:
+4. `app.config.from_object(_Defaults)`:
+   - Sets up default configurations from a module-level class, so the
+     defaults are built once at import instead of a fresh dict per
+     `create_app` call (which matters when tests create many apps):
      - `SECRET_KEY='dev'`: Used for session security (should be overridden in production).
-     - `DATABASE=...`: Defines the path to the SQLite database inside the instance folder.
+   - `DATABASE` depends on the per-app instance folder, so it is the one
+     value still computed inside the factory.
 
 5. `if test_config is None: ... else: ...`:
    - If `test_config` is not provided:
@@ -26,16 +29,29 @@ Explanation:
    - If `test_config` is provided:
      - Override the app’s config with the test configuration (useful for unit testing).
 
-6. `try: os.makedirs(app.instance_path)`:
-   - Ensures the instance folder exists.
+6. `os.makedirs(instance_path, exist_ok=True)`:
+   - Ensures the instance folder exists before the config points into it.
+   - Guarded by a cheap `os.path.isdir` check first: on warm restarts
+     (dev reloader, serverless warm invocations) the folder already
+     exists, so a single stat replaces the full mkdir syscall chain.
+   - `exist_ok=True` replaces the old try/except OSError, which was slower
+     (exception machinery on every warm restart) and swallowed real errors
+     such as permission failures.
    - The instance folder stores configuration files and the database, kept outside version control.
 
-7. `@app.route('/hello')`:
-   - Defines a simple route `/hello` that returns `"Hello, World"` when accessed in the browser.
+7. `app.add_url_rule('/hello', 'hello', hello)`:
+   - Registers a simple route `/hello` that returns `"Hello, World"` when accessed in the browser.
+   - The view lives at module level so repeated `create_app` calls share
+     one function object instead of creating a fresh closure per app.
 
-8. `from . import db` and `db.init_app(app)`:
-   - Imports a database module and initializes it with the Flask app.
-   - This binds database functions (like connection management) to the app.
+8. Lazy database wiring:
+   - The `db` module transitively imports `sqlite3` (a C extension with
+     non-trivial startup cost), so `create_app` no longer imports it up
+     front. Instead it registers a teardown handler that only delegates
+     to `db.close_db` if the module was ever imported, and an `init-db`
+     CLI command that imports `db` on first invocation.
+   - Routes that never touch the database (like `/hello`) therefore never
+     pay for the `sqlite3` import on worker cold start.
 
 9. `return app`:
    - Returns the fully configured Flask application instance.
@@ -47,17 +63,40 @@ It allows flexibility, easier testing, and better configuration management.
 """
 
 import os
+import sys
+
 from flask import Flask
 
+
+class _Defaults:
+    # Default configuration, defined once at module level so create_app
+    # does not rebuild a mapping on every call
+    SECRET_KEY = 'dev'  # Secret key for session security (should be overridden in production)
+
+
+def hello():
+    # Defined at module level so every create_app call (tests build many
+    # apps) reuses one function object instead of minting a closure
+    return 'Hello, World'
+
+
 def create_app(test_config=None):
     # Create the Flask app instance
     app = Flask(__name__, instance_relative_config=True)
     
-    # Set default configuration values
-    app.config.from_mapping(
-        SECRET_KEY='dev',  # Secret key for session security (should be overridden in production)
-        DATABASE=os.path.join(app.instance_path, 'flaskr.sqlite')  # Path to SQLite DB
-    )
+    # Ensure the instance folder exists before the config points into it.
+    # instance_path is a computed property, so read it once; exist_ok=True
+    # avoids the try/except dance and still surfaces real errors (EACCES)
+    instance_path = app.instance_path
+    if not os.path.isdir(instance_path):
+        # One stat on warm restarts beats makedirs' stat+mkdir chain;
+        # the mkdir only ever runs on a truly fresh instance folder
+        os.makedirs(instance_path, exist_ok=True)
+
+    # Set default configuration values; DATABASE depends on the per-app
+    # instance folder, so it is computed here rather than in _Defaults
+    app.config.from_object(_Defaults)
+    app.config['DATABASE'] = os.path.join(instance_path, 'flaskr.sqlite')  # Path to SQLite DB
 
     # Load custom config if provided, otherwise fall back to config.py
     if test_config is None:
@@ -67,20 +106,29 @@ def create_app(test_config=None):
         # Use test configuration (useful for testing environments)
         app.config.from_mapping(test_config)
     
-    # Ensure the instance folder exists
-    try:
-        os.makedirs(app.instance_path)
-    except OSError:
-        pass  # If the folder already exists, ignore the error
-
-    # Example route
-    @app.route('/hello')
-    def hello():
-        return 'Hello, World'
-    
-    # Import and initialize the database
-    from . import db
-    db.init_app(app)
-    
+    # Example route, registered against the shared module-level view
+    app.add_url_rule('/hello', 'hello', hello)
+
+
+    # Wire the database up lazily: importing the db module pulls in the
+    # sqlite3 C extension, so defer it until something actually needs it
+    @app.teardown_appcontext
+    def close_db(e=None):
+        # Only delegate if the db module was ever imported; requests that
+        # never touched the database skip it entirely
+        db = sys.modules.get(__name__ + '.db')
+        if db is not None:
+            db.close_db(e)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Clear the existing data and create new tables."""
+        import click
+
+        from . import db
+        db.init_db()
+        click.echo('Initialized the database.')
+
+
     # Return the application instance
     return app